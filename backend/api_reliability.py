@@ -1,59 +1,235 @@
 
 from __future__ import annotations
+import asyncio
+import hashlib
+import io
+import json
 import os
+import time
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi.responses import Response
+from typing import Awaitable, Callable, Dict, Optional
 
 from .schemas import (
     FalloProyeccionRequest, FalloProyeccionResponse,
+    FalloMatrizRequest, FalloMatrizResponse,
+    FalloMeta, FalloTemporal,
     CalendarEventRequest, CalendarEventResponse
 )
-from .reliability import project_failure_curve, render_failure_chart, safe_filename
+from .reliability import (
+    project_failure_curve, render_failure_chart,
+    project_failure_matrix, render_failure_matrix_chart, safe_filename, chart_extension
+)
 from .google_calendar_integration import CalendarClient
+from .workers import run_cpu_bound, run_blocking_io
+from .responses import ModelResponse
+from .storage import BaseStore, STORE_URL, STORE_TTL_S, get_store, get_or_compute
 
 router = APIRouter(prefix="/api", tags=["fallos", "calendar"])
 
-# Dónde guardar las imágenes para servirlas como estáticos (frontend/assets/generated/...)
+# Dónde guardar las imágenes para servirlas como estáticos (frontend/assets/generated/...).
+# Con STORE_URL (varios workers/nodos) las gráficas viven en el store compartido.
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 FRONT_GEN = os.path.abspath(os.path.join(BASE_DIR, "..", "frontend", "assets", "generated"))
-os.makedirs(FRONT_GEN, exist_ok=True)
+if not STORE_URL:
+    os.makedirs(FRONT_GEN, exist_ok=True)
 
-@router.post("/fallos/proyeccion", response_model=FalloProyeccionResponse)
-def proyeccion_fallos(payload: FalloProyeccionRequest):
-    try:
-        xs, ys, meta, temporal = project_failure_curve(
-            part_type=payload.part_type,
-            current_km=payload.current_km,
-            last_service_km=payload.last_service_km,
-            service_interval_km=payload.service_interval_km,
-            months_since_service=payload.months_since_service,
-            service_interval_months=payload.service_interval_months,
-            clima=payload.clima,
-            horizon_km=payload.horizon_km or None,
-            points=payload.points or 201,
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+# Trabajos pesados: funciones de nivel módulo para que se puedan enviar al pool de procesos.
+# Con outdir escriben la imagen en disco; sin outdir devuelven sus bytes.
+def _proyeccion_job(params: dict, outdir: Optional[str], fmt: str = "png"):
+    xs, ys, meta, temporal = project_failure_curve(**params)
+    if outdir:
+        filename = safe_filename(f"proyeccion_{meta['part_type']}", chart_extension(fmt))
+        render_failure_chart(xs, ys, meta, os.path.join(outdir, filename), fmt=fmt)
+        return xs, ys, meta, temporal, filename
+    buf = io.BytesIO()
+    render_failure_chart(xs, ys, meta, buf, fmt=fmt)
+    return xs, ys, meta, temporal, buf.getvalue()
+
+def _matriz_job(params: dict, outdir: Optional[str], fmt: str = "png", render: bool = True):
+    xs, matrix, metas = project_failure_matrix(**params)
+    if not render:
+        return xs, matrix, metas, None
+    if outdir:
+        filename = safe_filename("proyeccion_matriz", chart_extension(fmt))
+        render_failure_matrix_chart(xs, matrix, metas, os.path.join(outdir, filename), fmt=fmt)
+        return xs, matrix, metas, filename
+    buf = io.BytesIO()
+    render_failure_matrix_chart(xs, matrix, metas, buf, fmt=fmt)
+    return xs, matrix, metas, buf.getvalue()
+
+def _cache_key(kind: str, params: dict) -> str:
+    """Clave estable para entradas equivalentes (mayúsculas y orden de campos no importan)."""
+    def norm(v):
+        if isinstance(v, str):
+            return v.lower()
+        if isinstance(v, (list, tuple)):
+            return [norm(x) for x in v]
+        return v
+    raw = json.dumps({k: norm(v) for k, v in params.items()}, sort_keys=True)
+    return f"{kind}:v1:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+class _SingleFlight:
+    """Coalescencia en proceso: peticiones idénticas concurrentes esperan un solo cálculo.
+
+    El cálculo corre como tarea propia (protegida con shield), así que si el primer
+    cliente se desconecta los demás igual reciben el resultado. Los errores se
+    propagan a todos los que esperaban.
 
-    # Escribir imagen
-    filename = safe_filename(f"proyeccion_{meta['part_type']}")
-    outpath = os.path.join(FRONT_GEN, filename)
-    render_failure_chart(xs, ys, meta, outpath)
+    `leaders` cuenta las peticiones que encabezaron un grupo; `computed`, los trabajos
+    que de verdad corrieron en el pool (en modo store un líder puede encontrar el
+    resultado ya guardado y no calcular nada)."""
 
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.computed = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, compute: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def run_job(self, job: Callable, *args):
+        """Corre un trabajo pesado en el pool y lo cuenta como cálculo hecho."""
+        self.computed += 1
+        return await run_cpu_bound(job, *args)
+
+    def stats(self) -> dict:
+        return {
+            "leaders": self.leaders,
+            "computed": self.computed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+_flights = _SingleFlight()
+
+def _chart_url(filename: str) -> str:
+    if STORE_URL:
+        return f"/api/fallos/graficas/{filename}"
     # URL pública (StaticFiles sirve /frontend en la raíz)
-    chart_url = f"/assets/generated/{filename}"
-    return FalloProyeccionResponse(
+    return f"/assets/generated/{filename}"
+
+async def _shared_chart_result(store: BaseStore, kind: str, params: dict, fmt: str, job, build) -> ModelResponse:
+    """Resultado + gráfica calculados una sola vez entre workers y guardados en el store."""
+    key = _cache_key(kind, {**params, "chart_format": fmt})
+    serialize_ms = 0.0  # solo quien calcula serializa; los demás reciben bytes ya codificados
+
+    async def compute() -> bytes:
+        *result, blob = await _flights.run_job(job, params, None, fmt)
+        filename = f"{kind}_{key.rsplit(':', 1)[1][:20]}.{chart_extension(fmt)}"
+        # La gráfica vive más que el resultado que la referencia
+        await run_blocking_io(store.set, f"chart:{filename}", blob, 2 * STORE_TTL_S)
+        nonlocal serialize_ms
+        t0 = time.perf_counter()
+        body = build(*result, _chart_url(filename)).model_dump_json().encode("utf-8")
+        serialize_ms = (time.perf_counter() - t0) * 1000.0
+        return body
+
+    body = await _flights.run(key, lambda: get_or_compute(store, key, compute))
+    return ModelResponse(body, serialize_ms=serialize_ms)
+
+def _proyeccion_model(xs, ys, meta, temporal, chart_url) -> FalloProyeccionResponse:
+    # Resultado interno y confiable: se arma sin revalidar hasta 2x1001 floats
+    return FalloProyeccionResponse.model_construct(
         part_type=meta["part_type"],
         x_km=xs,
         risk_pct=ys,
         chart_url=chart_url,
-        meta=meta,
-        temporal=temporal or None,
+        meta=FalloMeta.model_construct(**meta),
+        temporal=FalloTemporal.model_construct(**temporal) if temporal else None,
+    )
+
+def _matriz_model(xs, matrix, metas, chart_url) -> FalloMatrizResponse:
+    return FalloMatrizResponse.model_construct(
+        part_types=[m["part_type"] for m in metas],
+        x_km=xs,
+        risk_pct=matrix,
+        chart_url=chart_url,
+        meta=[FalloMeta.model_construct(**m) for m in metas],
+    )
+
+@router.post("/fallos/proyeccion", response_model=FalloProyeccionResponse)
+async def proyeccion_fallos(payload: FalloProyeccionRequest):
+    params = dict(
+        part_type=payload.part_type,
+        current_km=payload.current_km,
+        last_service_km=payload.last_service_km,
+        service_interval_km=payload.service_interval_km,
+        months_since_service=payload.months_since_service,
+        service_interval_months=payload.service_interval_months,
+        clima=payload.clima,
+        horizon_km=payload.horizon_km or None,
+        points=payload.points or 201,
+    )
+    fmt = payload.chart_format
+    store = get_store()
+    try:
+        if store is not None:
+            return await _shared_chart_result(store, "proyeccion", params, fmt, _proyeccion_job, _proyeccion_model)
+        # Calcular curva y escribir imagen fuera del event loop
+        xs, ys, meta, temporal, filename = await _flights.run(
+            _cache_key("proyeccion", {**params, "chart_format": fmt}),
+            lambda: _flights.run_job(_proyeccion_job, params, FRONT_GEN, fmt),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ModelResponse(_proyeccion_model(xs, ys, meta, temporal, _chart_url(filename)))
+
+@router.post("/fallos/proyeccion/matriz", response_model=FalloMatrizResponse)
+async def proyeccion_fallos_matriz(payload: FalloMatrizRequest):
+    params = dict(
+        parts=[(p.part_type, p.last_service_km, p.service_interval_km) for p in payload.parts],
+        current_km=payload.current_km,
+        clima=payload.clima,
+        horizon_km=payload.horizon_km or None,
+        points=payload.points or 201,
     )
+    fmt = payload.chart_format
+    store = get_store()
+    try:
+        if not payload.render_chart:
+            # Sin gráfica la evaluación vectorizada es barata: se hace en línea
+            xs, matrix, metas, _ = _matriz_job(params, None, render=False)
+            return ModelResponse(_matriz_model(xs, matrix, metas, None))
+        if store is not None:
+            return await _shared_chart_result(store, "matriz", params, fmt, _matriz_job, _matriz_model)
+        xs, matrix, metas, filename = await _flights.run(
+            _cache_key("matriz", {**params, "chart_format": fmt}),
+            lambda: _flights.run_job(_matriz_job, params, FRONT_GEN, fmt),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return ModelResponse(_matriz_model(xs, matrix, metas, _chart_url(filename)))
+
+@router.get("/fallos/metricas")
+async def metricas_fallos():
+    """Contadores de coalescencia de este worker: líderes de grupo, trabajos que corrieron
+    en el pool y peticiones que esperaron uno en curso."""
+    return _flights.stats()
+
+@router.get("/fallos/graficas/{filename}", include_in_schema=False)
+async def grafica_compartida(filename: str):
+    store = get_store()
+    blob = await run_blocking_io(store.get, f"chart:{filename}") if store is not None else None
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Gráfica no encontrada o expirada.")
+    media_type = "image/svg+xml" if filename.endswith(".svg") else "image/png"
+    return Response(blob, media_type=media_type, headers={"Cache-Control": "public, max-age=86400, immutable"})
 
 @router.post("/calendar/agendar", response_model=CalendarEventResponse)
-def calendar_agendar(payload: CalendarEventRequest):
+async def calendar_agendar(payload: CalendarEventRequest):
     client = CalendarClient()
-    # La creación puede devolver estado "not_configured" con instrucciones
-    return client.create_event(payload)
+    # La creación puede devolver estado "not_configured" con instrucciones.
+    # El cliente de Google es bloqueante: va a hilos con su propio límite.
+    return await run_blocking_io(client.create_event, payload)
@@ -1,22 +1,26 @@
 
 from __future__ import annotations
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from .api_reliability import router as reliability_router
+from .workers import shutdown_pool
+from .storage import close_store
 
 from .schemas import (
     ServicioRequest, ServicioResponse,
     ConsumoRequest, ConsumoResponse,
     BateriaRequest, BateriaResponse,
+    BateriaFlotaRequest, BateriaFlotaResponse,
     AutopartesRequest, AutopartesResponse,
     DepreciacionRequest, DepreciacionResponse,
     TipsResponse, Tip
 )
 from .services import (
-    calc_servicio, calc_consumo, eval_bateria,
+    calc_servicio, calc_consumo, eval_bateria, forecast_bateria_flota,
     build_autopartes_links, calc_depreciacion, get_tips
 )
 
@@ -24,7 +28,13 @@ APP_TITLE = "Calculadora Automotriz API"
 DESCRIPTION = "Backend en FastAPI para la Calculadora Automotriz."
 VERSION = "1.0.0"
 
-app = FastAPI(title=APP_TITLE, description=DESCRIPTION, version=VERSION)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_pool()
+    close_store()
+
+app = FastAPI(title=APP_TITLE, description=DESCRIPTION, version=VERSION, lifespan=lifespan)
 
 # CORS (liberal por simplicidad; al servir front con esta app no será necesario)
 app.add_middleware(
@@ -36,9 +46,11 @@ app.add_middleware(
 )
 
 # -------------------------- API ROUTES --------------------------
+# Las calculadoras son baratas: `async def` para correr en el event loop sin pasar
+# por el threadpool. El trabajo pesado vive en api_reliability (ver workers.py).
 
 @app.post("/api/servicio/calculate", response_model=ServicioResponse)
-def api_servicio(payload: ServicioRequest):
+async def api_servicio(payload: ServicioRequest):
     # Validaciones básicas de coherencia
     if payload.current_km < payload.last_service_km:
         raise HTTPException(status_code=400, detail="El kilometraje actual no puede ser menor al del último servicio.")
@@ -46,31 +58,40 @@ def api_servicio(payload: ServicioRequest):
 
 
 @app.post("/api/consumo/calculate", response_model=ConsumoResponse)
-def api_consumo(payload: ConsumoRequest):
+async def api_consumo(payload: ConsumoRequest):
     return calc_consumo(payload)
 
 
 @app.post("/api/bateria/evaluate", response_model=BateriaResponse)
-def api_bateria(payload: BateriaRequest):
+async def api_bateria(payload: BateriaRequest):
     if payload.install_date > __import__("datetime").date.today():
         raise HTTPException(status_code=400, detail="La fecha de instalación no puede ser futura.")
     return eval_bateria(payload)
 
 
+@app.post("/api/bateria/pronostico", response_model=BateriaFlotaResponse)
+async def api_bateria_pronostico(payload: BateriaFlotaRequest):
+    today = __import__("datetime").date.today()
+    for i, b in enumerate(payload.batteries):
+        if b.install_date > today:
+            raise HTTPException(status_code=400, detail=f"Batería {i}: la fecha de instalación no puede ser futura.")
+    return forecast_bateria_flota(payload)
+
+
 @app.post("/api/autopartes/search", response_model=AutopartesResponse)
-def api_autopartes(payload: AutopartesRequest):
+async def api_autopartes(payload: AutopartesRequest):
     return build_autopartes_links(payload)
 
 
 @app.post("/api/depreciacion/calculate", response_model=DepreciacionResponse)
-def api_depreciacion(payload: DepreciacionRequest):
+async def api_depreciacion(payload: DepreciacionRequest):
     if payload.purchase_year > __import__("datetime").date.today().year:
         raise HTTPException(status_code=400, detail="El año de compra no puede ser en el futuro.")
     return calc_depreciacion(payload)
 
 
 @app.get("/api/tips/{category}", response_model=TipsResponse)
-def api_tips(category: str):
+async def api_tips(category: str):
     items = get_tips(category)
     return TipsResponse(category=category, items=[Tip(**i) for i in items])
 
@@ -80,7 +101,7 @@ def api_tips(category: str):
 FRONT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "frontend"))
 
 @app.get("/", include_in_schema=False)
-def index():
+async def index():
     index_path = os.path.join(FRONT_DIR, "index.html")
     return FileResponse(index_path)
 
@@ -0,0 +1,81 @@
+"""Mide el tiempo por render de las gráficas de proyección.
+
+Compara, para cada formato de salida:
+  pyplot     el render anterior: estado global de pyplot, tight_layout y savefig por render
+  nueva      Figure sin pyplot, armada de cero en cada render (reuse=False)
+  plantilla  figura reutilizada por autoparte (reuse=True)
+
+Uso:
+    python -m backend.bench_charts --renders 40 --points 201
+"""
+from __future__ import annotations
+import argparse
+import io
+import statistics
+import time
+from functools import partial
+
+import matplotlib.pyplot as plt
+
+from .reliability import CHART_FORMATS, _PARTS, _save_figure, project_failure_curve, render_failure_chart
+
+
+def _render_pyplot(xs_km, ys_pct, meta, outfile, fmt: str = "png"):
+    """Render previo a las plantillas, tal cual, para tener la línea base."""
+    plt.figure(figsize=(7, 4.5))
+    plt.plot(xs_km, ys_pct, label="Riesgo acumulado en el horizonte (condicional)")
+    plt.axvline(0.0, linestyle="--", linewidth=1, label="Hoy")
+    if "interval_km" in meta:
+        plt.axvline(meta["interval_km"] - meta.get("t_now_km", 0.0), linestyle="--", linewidth=1, label="Intervalo recomendado")
+    plt.xlabel("Kilómetros por recorrer (si NO haces el servicio)")
+    plt.ylabel("Probabilidad de fallo (%)")
+    plt.title(f"Proyección de fallos: {meta.get('part_type', '').capitalize()}")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    # El motor de layout queda activo, como antes: savefig vuelve a acomodar
+    _save_figure(plt.gcf(), outfile, fmt)
+    plt.close()
+    return outfile
+
+MODES = {
+    "pyplot": _render_pyplot,
+    "nueva": partial(render_failure_chart, reuse=False),
+    "plantilla": partial(render_failure_chart, reuse=True),
+}
+
+
+def _bench(curves, renders: int, fmt: str, render):
+    times, size = [], 0
+    for i in range(renders):
+        xs, ys, meta = curves[i % len(curves)]
+        buf = io.BytesIO()
+        t0 = time.perf_counter()
+        render(xs, ys, meta, buf, fmt=fmt)
+        times.append((time.perf_counter() - t0) * 1000.0)
+        size = len(buf.getvalue())
+    # El primer render de cada autoparte arma la plantilla: se reporta aparte
+    warm = times[len(curves):] or times
+    return statistics.median(warm), max(times[:len(curves)]), size
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmark de render de gráficas")
+    ap.add_argument("--renders", type=int, default=40)
+    ap.add_argument("--points", type=int, default=201)
+    args = ap.parse_args(argv)
+
+    curves = []
+    for i, part in enumerate(_PARTS):
+        xs, ys, meta, _ = project_failure_curve(part, 40000 + 3000 * i, 30000, 20000, points=args.points)
+        curves.append((xs, ys, meta))
+
+    print(f"{'formato':<12}{'modo':<12}{'mediana ms':>12}{'1er render ms':>15}{'bytes':>10}")
+    for fmt in CHART_FORMATS:
+        for mode, render in MODES.items():
+            median, first, size = _bench(curves, args.renders, fmt, render)
+            print(f"{fmt:<12}{mode:<12}{median:>12.1f}{first:>15.1f}{size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Generador de carga para reproducir tráfico real contra un uvicorn local.
+
+Uso:
+    python -m backend.loadtest --concurrency 1,8,32 --duration 10
+    python -m backend.loadtest --url http://127.0.0.1:8000 --mix fallos=5,tips=1
+    python -m backend.loadtest --baseline loadtest_reports/20251105-101500.json
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from .schemas import (
+    ServicioRequest, ConsumoRequest, BateriaRequest, AutopartesRequest,
+    DepreciacionRequest, FalloProyeccionRequest, FalloMatrizRequest, FalloMatrizParte,
+)
+from .services import _TIPS
+from .reliability import _PARTS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORTS_DIR = os.path.abspath(os.path.join(BASE_DIR, "..", "loadtest_reports"))
+
+
+# ----------------------- Payloads (derivados de schemas.py) -----------------------
+
+def _choices(model, field: str) -> List[str]:
+    """Opciones válidas a partir del `pattern` ^(a|b|c)$ del modelo."""
+    for m in model.model_fields[field].metadata:
+        pattern = getattr(m, "pattern", None)
+        if pattern:
+            return re.fullmatch(r"\^\((.*)\)\$", pattern).group(1).split("|")
+    raise ValueError(f"{model.__name__}.{field} no tiene pattern")
+
+def _servicio() -> dict:
+    last = random.uniform(0, 150000)
+    return ServicioRequest(
+        current_km=last + random.uniform(0, 20000),
+        last_service_km=last,
+        service_interval_km=random.choice([5000, 10000, 15000]),
+        avg_km_per_month=random.choice([0, 800, 1500, 2500]),
+    ).model_dump(mode="json")
+
+def _consumo() -> dict:
+    return ConsumoRequest(
+        distance_km=random.uniform(50, 900),
+        liters=random.uniform(5, 60),
+        price_per_liter=random.uniform(20, 27),
+        driving_type=random.choice(_choices(ConsumoRequest, "driving_type")),
+    ).model_dump(mode="json")
+
+def _bateria() -> dict:
+    return BateriaRequest(
+        install_date=date.today() - timedelta(days=random.randint(0, 365 * 8)),
+        battery_type=random.choice(_choices(BateriaRequest, "battery_type")),
+        usage=random.choice(_choices(BateriaRequest, "usage")),
+        climate=random.choice(_choices(BateriaRequest, "climate")),
+    ).model_dump(mode="json")
+
+def _autopartes() -> dict:
+    return AutopartesRequest(
+        brand=random.choice(["Nissan", "Chevrolet", "Volkswagen", "Toyota", ""]),
+        model=random.choice(["Versa", "Aveo", "Jetta", "Corolla", ""]),
+        year=random.choice([None, 2015, 2019, 2023]),
+        part_type=random.choice(list(_PARTS)),
+    ).model_dump(mode="json")
+
+def _depreciacion() -> dict:
+    return DepreciacionRequest(
+        purchase_price=random.uniform(150000, 900000),
+        purchase_year=random.randint(2005, datetime.now().year),
+        current_km=random.uniform(0, 250000),
+        condition=random.choice(_choices(DepreciacionRequest, "condition")),
+        brand_class=random.choice(_choices(DepreciacionRequest, "brand_class")),
+    ).model_dump(mode="json")
+
+def _fallos() -> dict:
+    last = random.uniform(0, 100000)
+    return FalloProyeccionRequest(
+        part_type=random.choice(list(_PARTS)),
+        current_km=last + random.uniform(0, 40000),
+        last_service_km=last,
+        service_interval_km=random.choice([10000, 20000, 30000, 60000]),
+        months_since_service=random.choice([None, 6, 18]),
+        service_interval_months=random.choice([None, 12, 24]),
+        clima=random.choice([None, "templado", "calido", "frio"]),
+        points=random.choice([51, 201, 501, 1001]),
+    ).model_dump(mode="json", exclude_none=True)
+
+def _fallos_matriz() -> dict:
+    current = random.uniform(20000, 150000)
+    parts = random.sample(list(_PARTS), random.randint(2, len(_PARTS)))
+    return FalloMatrizRequest(
+        current_km=current,
+        parts=[
+            FalloMatrizParte(
+                part_type=p,
+                last_service_km=max(0.0, current - random.uniform(0, 30000)),
+                service_interval_km=random.choice([10000, 30000, 60000]),
+            )
+            for p in parts
+        ],
+        points=random.choice([51, 201, 1001]),
+    ).model_dump(mode="json")
+
+
+@dataclass
+class Route:
+    name: str
+    method: str
+    path: Callable[[], str]
+    payload: Optional[Callable[[], dict]] = None
+
+ROUTES: Dict[str, Route] = {
+    "servicio": Route("servicio", "POST", lambda: "/api/servicio/calculate", _servicio),
+    "consumo": Route("consumo", "POST", lambda: "/api/consumo/calculate", _consumo),
+    "bateria": Route("bateria", "POST", lambda: "/api/bateria/evaluate", _bateria),
+    "autopartes": Route("autopartes", "POST", lambda: "/api/autopartes/search", _autopartes),
+    "depreciacion": Route("depreciacion", "POST", lambda: "/api/depreciacion/calculate", _depreciacion),
+    "tips": Route("tips", "GET", lambda: f"/api/tips/{random.choice(list(_TIPS))}"),
+    "fallos": Route("fallos", "POST", lambda: "/api/fallos/proyeccion", _fallos),
+    "fallos_matriz": Route("fallos_matriz", "POST", lambda: "/api/fallos/proyeccion/matriz", _fallos_matriz),
+    "index": Route("index", "GET", lambda: "/"),
+}
+
+# Mezcla por defecto: mayoría de calculadoras baratas, algo de gráficas y estáticos
+DEFAULT_MIX: Dict[str, float] = {
+    "servicio": 15, "consumo": 15, "bateria": 10, "autopartes": 5, "depreciacion": 10,
+    "tips": 20, "index": 10, "fallos": 12, "fallos_matriz": 3,
+}
+
+
+# ----------------------- Ejecución -----------------------
+
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    # Rango más cercano
+    idx = max(0, min(len(sorted_vals) - 1, math.ceil(pct / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[idx]
+
+async def _run_level(client: httpx.AsyncClient, mix: Dict[str, float], concurrency: int, duration: float) -> dict:
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    latencies: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, Dict[str, int]] = {n: {} for n in names}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            route = ROUTES[random.choices(names, weights)[0]]
+            try:
+                body = route.payload() if route.payload else None
+            except ValueError as e:
+                # Un payload inválido cuenta como error de esa ruta; no tumba la corrida
+                key = f"payload:{type(e).__name__}"
+                errors[route.name][key] = errors[route.name].get(key, 0) + 1
+                continue
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(route.method, route.path(), json=body)
+                status = str(r.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            if status.startswith("2"):
+                latencies[route.name].append(elapsed_ms)
+            else:
+                errors[route.name][status] = errors[route.name].get(status, 0) + 1
+
+    t_start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    wall = time.perf_counter() - t_start
+
+    routes = {}
+    for n in names:
+        lat = sorted(latencies[n])
+        routes[n] = {
+            "ok": len(lat),
+            "errors": errors[n],
+            "rps": round(len(lat) / wall, 2),
+            "p50_ms": round(_percentile(lat, 50), 2),
+            "p95_ms": round(_percentile(lat, 95), 2),
+            "p99_ms": round(_percentile(lat, 99), 2),
+        }
+    total_ok = sum(r["ok"] for r in routes.values())
+    return {"concurrency": concurrency, "wall_s": round(wall, 2), "rps": round(total_ok / wall, 2), "routes": routes}
+
+def _wait_until_up(url: str, timeout: float = 30.0) -> None:
+    t_end = time.time() + timeout
+    while time.time() < t_end:
+        try:
+            if httpx.get(url + "/api/tips/seguridad", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {url}")
+
+def _start_server(port: int, workers: int) -> subprocess.Popen:
+    root = os.path.abspath(os.path.join(BASE_DIR, ".."))
+    cmd = [sys.executable, "-m", "uvicorn", "backend.app:app", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=root)
+
+def _print_level(level: dict, baseline: Optional[dict]) -> None:
+    print(f"\n== concurrencia {level['concurrency']}: {level['rps']} req/s en {level['wall_s']} s ==")
+    print(f"{'ruta':<15}{'ok':>7}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for name, r in level["routes"].items():
+        line = (f"{name:<15}{r['ok']:>7}{sum(r['errors'].values()):>6}{r['rps']:>9}"
+                f"{r['p50_ms']:>9}{r['p95_ms']:>9}{r['p99_ms']:>9}")
+        prev = (baseline or {}).get(name)
+        if prev and prev["p95_ms"]:
+            delta = 100.0 * (r["p95_ms"] - prev["p95_ms"]) / prev["p95_ms"]
+            line += f"   p95 {delta:+.1f}% vs base"
+        print(line)
+
+def _parse_mix(text: Optional[str]) -> Dict[str, float]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in ROUTES:
+            raise SystemExit(f"Ruta desconocida en --mix: {name} (opciones: {', '.join(ROUTES)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+async def run(url: str, mix: Dict[str, float], levels: List[int], duration: float) -> List[dict]:
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        return [await _run_level(client, mix, c, duration) for c in levels]
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Prueba de carga de la Calculadora Automotriz")
+    ap.add_argument("--url", help="Servidor existente; si se omite se levanta uvicorn local")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--workers", type=int, default=1, help="Workers de uvicorn (solo sin --url)")
+    ap.add_argument("--concurrency", default="1,8,32", help="Niveles de concurrencia, separados por coma")
+    ap.add_argument("--duration", type=float, default=10.0, help="Segundos por nivel")
+    ap.add_argument("--mix", help="Pesos por ruta, ej. fallos=5,tips=1")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--baseline", help="Reporte JSON previo para comparar p95")
+    ap.add_argument("--label", default="", help="Etiqueta libre guardada en el reporte")
+    args = ap.parse_args(argv)
+
+    random.seed(args.seed)
+    mix = _parse_mix(args.mix)
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    server = None
+    url = args.url
+    if not url:
+        url = f"http://127.0.0.1:{args.port}"
+        server = _start_server(args.port, args.workers)
+    try:
+        _wait_until_up(url)
+        results = asyncio.run(run(url, mix, levels, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {lvl["concurrency"]: lvl["routes"] for lvl in json.load(f)["levels"]}
+    for level in results:
+        _print_level(level, (baseline or {}).get(level["concurrency"]))
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    report_path = os.path.join(REPORTS_DIR, f"{stamp}.json")
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "label": args.label,
+        "url": url,
+        "workers": None if args.url else args.workers,
+        "duration_s": args.duration,
+        "mix": mix,
+        "levels": results,
+    }
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nReporte guardado en {report_path}")
+
+
+if __name__ == "__main__":
+    main()
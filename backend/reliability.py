@@ -3,10 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Tuple, List, Optional
 from math import exp
-import os, time
+import io, os, time
+import numpy as np
 import matplotlib
 matplotlib.use("Agg")  # No display server required
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 # NOTA DE ESTILO: Cumple con la restricción de usar exclusivamente Matplotlib,
 # sin seaborn y sin especificar colores/manual styles.
@@ -142,29 +145,157 @@ def project_failure_curve(
 
     return xs, ys, meta, temporal
 
-def render_failure_chart(xs_km: List[float], ys_pct: List[float], meta: Dict, outfile: str) -> str:
-    """Genera la gráfica y la guarda en outfile (PNG). Devuelve la ruta escrita."""
+def project_failure_matrix(
+    parts: List[Tuple[str, float, float]],
+    current_km: float,
+    clima: Optional[str] = None,
+    horizon_km: Optional[float] = None,
+    points: int = 201,
+):
+    """Evalúa varias autopartes sobre una misma malla de km en una sola pasada.
+    `parts` es una lista de (part_type, last_service_km, service_interval_km).
+    Devuelve (x_km, matriz de riesgo en % [autoparte][punto], metadatos por autoparte)."""
+    if not parts:
+        raise ValueError("Se requiere al menos una autoparte")
+
+    names, lams, ks, t_nows, metas = [], [], [], [], []
+    for part_type, last_service_km, service_interval_km in parts:
+        part_type = part_type.lower()
+        if part_type not in _PARTS:
+            raise ValueError(f"Autoparte no soportada: {part_type}")
+        if part_type in names:
+            raise ValueError(f"Autoparte repetida: {part_type}")
+        spec = _PARTS[part_type]
+        lam_km = _calibrate_lambda(service_interval_km, spec.k_km, spec.p_at_interval_km)
+        lam_km, _ = _apply_context_adjustments(part_type, lam_km, None, clima)
+        t_now_km = max(0.0, current_km - last_service_km)
+        names.append(part_type)
+        lams.append(lam_km)
+        ks.append(spec.k_km)
+        t_nows.append(t_now_km)
+        metas.append({
+            "part_type": part_type,
+            "t_now_km": t_now_km,
+            "interval_km": service_interval_km,
+            "lambda_km": lam_km,
+            "k_km": spec.k_km,
+        })
+
+    if horizon_km is None:
+        horizon_km = max(max(max(p[2], 1.0) for p in parts) * 1.5, 1.0)
+    step = max(1.0, horizon_km / (points - 1))
+
+    # Una sola malla compartida (1 x N) y parámetros por autoparte (P x 1)
+    xs = np.round(np.arange(points) * step, 2)
+    lam = np.asarray(lams)[:, None]
+    k = np.asarray(ks)[:, None]
+    t_now = np.asarray(t_nows)[:, None]
+
+    def weibull_F(t):
+        return np.where(t > 0, -np.expm1(-(np.maximum(t, 0.0) / lam) ** k), 0.0)
+
+    F_now = weibull_F(t_now)
+    F_future = weibull_F(t_now + xs[None, :])
+    survival_now = np.maximum(1e-9, 1.0 - F_now)
+    risk = np.round(100.0 * np.clip((F_future - F_now) / survival_now, 0.0, 1.0), 2)
+
+    return xs.tolist(), risk.tolist(), metas
+
+# Formatos de salida: "png" (144 dpi, el de siempre), "png_ligero" (96 dpi con paleta
+# indexada, archivo mucho más chico) y "svg".
+CHART_FORMATS = ("png", "png_ligero", "svg")
+
+def chart_extension(fmt: str) -> str:
+    return "svg" if fmt == "svg" else "png"
+
+def _save_figure(fig, outfile, fmt: str = "png") -> None:
+    if fmt == "svg":
+        fig.savefig(outfile, format="svg")
+    elif fmt == "png_ligero":
+        from PIL import Image
+        dpi = 96
+        w, h = (int(round(v * dpi)) for v in fig.get_size_inches())
+        buf = io.BytesIO()
+        fig.savefig(buf, format="rgba", dpi=dpi)
+        img = Image.frombuffer("RGBA", (w, h), buf.getbuffer(), "raw", "RGBA", 0, 1).convert("RGB")
+        img.quantize(colors=64, method=Image.Quantize.FASTOCTREE).save(outfile, format="PNG")
+    else:
+        fig.savefig(outfile, format="png", dpi=144)
+
+@dataclass
+class _ChartTemplate:
+    # Figura ya armada (ejes, etiquetas, leyenda, rejilla); por render solo cambian los datos
+    fig: Figure
+    ax: object
+    curve: object
+    interval: object
+
+# Una plantilla por autoparte en cada proceso (cada worker del pool tiene las suyas).
+# No es thread-safe: en la app los renders corren en procesos de un solo hilo.
+_TEMPLATES: Dict[str, _ChartTemplate] = {}
+
+# Márgenes fijos (fracción de la figura) con holgura para las etiquetas más anchas posibles
+# (riesgos con decimales en Y, horizontes de millones de km en X). Al no depender de los
+# datos, una plantilla reutilizada se ve igual sin importar qué se graficó antes.
+_CHART_MARGINS = dict(left=0.14, right=0.96, bottom=0.135, top=0.91)
+
+def _build_chart_template(part_type: str) -> _ChartTemplate:
+    fig = Figure(figsize=(7, 4.5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    curve, = ax.plot([], [], label="Riesgo acumulado en el horizonte (condicional)")
+    # Líneas guía
+    ax.axvline(0.0, linestyle="--", linewidth=1, label="Hoy")
+    interval = ax.axvline(0.0, linestyle="--", linewidth=1, label="Intervalo recomendado")
+    ax.set_xlabel("Kilómetros por recorrer (si NO haces el servicio)")
+    ax.set_ylabel("Probabilidad de fallo (%)")
+    ax.set_title(f"Proyección de fallos: {part_type.capitalize()}")
+    ax.legend()
+    ax.grid(True)
+    # Sin motor de layout, savefig no hace un dibujo previo solo para acomodar
+    fig.set_layout_engine("none")
+    fig.subplots_adjust(**_CHART_MARGINS)
+    return _ChartTemplate(fig=fig, ax=ax, curve=curve, interval=interval)
+
+def render_failure_chart(xs_km: List[float], ys_pct: List[float], meta: Dict, outfile, fmt: str = "png", reuse: bool = True):
+    """Genera la gráfica y la guarda en outfile (ruta o archivo binario). Devuelve outfile.
+    Con reuse=True se actualiza la plantilla de la autoparte en vez de crear otra figura."""
+    part_type = meta.get("part_type", "")
+    tpl = _TEMPLATES.get(part_type) if reuse else None
+    if tpl is None:
+        tpl = _build_chart_template(part_type)
+        if reuse:
+            _TEMPLATES[part_type] = tpl
+
+    tpl.curve.set_data(xs_km, ys_pct)
+    if "interval_km" in meta:
+        x = meta["interval_km"] - meta.get("t_now_km", 0.0)
+        tpl.interval.set_xdata([x, x])
+    tpl.interval.set_visible("interval_km" in meta)
+    tpl.ax.relim()
+    tpl.ax.autoscale_view()
+    _save_figure(tpl.fig, outfile, fmt)
+    return outfile
+
+def render_failure_matrix_chart(xs_km: List[float], matrix_pct: List[List[float]], metas: List[Dict], outfile, fmt: str = "png"):
+    """Genera una sola gráfica con una línea por autoparte en outfile (ruta o archivo binario). Devuelve outfile."""
     import matplotlib.pyplot as plt
 
     plt.figure(figsize=(7, 4.5))
-    plt.plot(xs_km, ys_pct, label="Riesgo acumulado en el horizonte (condicional)")
-    # Líneas guía
-    try:
-        plt.axvline(0.0, linestyle="--", linewidth=1, label="Hoy")
-        if "interval_km" in meta:
-            plt.axvline(meta["interval_km"] - meta.get("t_now_km", 0.0), linestyle="--", linewidth=1, label="Intervalo recomendado")
-    except Exception:
-        pass
+    for meta, ys_pct in zip(metas, matrix_pct):
+        plt.plot(xs_km, ys_pct, label=meta.get("part_type", "").capitalize())
+    plt.axvline(0.0, linestyle="--", linewidth=1, label="Hoy")
     plt.xlabel("Kilómetros por recorrer (si NO haces el servicio)")
     plt.ylabel("Probabilidad de fallo (%)")
-    plt.title(f"Proyección de fallos: {meta.get('part_type', '').capitalize()}")
+    plt.title("Proyección de fallos por autoparte")
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
-    plt.savefig(outfile, dpi=144)
+    plt.gcf().set_layout_engine("none")  # evita un segundo dibujo en savefig
+    _save_figure(plt.gcf(), outfile, fmt)
     plt.close()
     return outfile
 
-def safe_filename(prefix: str) -> str:
+def safe_filename(prefix: str, ext: str = "png") -> str:
     ts = int(time.time() * 1000)
-    return f"{prefix}_{ts}.png"
+    return f"{prefix}_{ts}.{ext}"
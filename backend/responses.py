@@ -0,0 +1,40 @@
+from __future__ import annotations
+import time
+from typing import Any, Mapping, Optional
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class ModelResponse(JSONResponse):
+    """Serializa un modelo Pydantic directo a JSON con pydantic-core (Rust).
+
+    Devolver esta respuesta desde un endpoint evita que FastAPI vuelva a validar el
+    resultado contra `response_model` y lo pase por `jsonable_encoder`. Úsala solo
+    con modelos armados por nosotros (p. ej. con `model_construct`).
+    Agrega `Server-Timing: serialize;dur=<ms>` para medir el costo de serializar.
+    También acepta un cuerpo ya codificado (bytes, p. ej. leído del store); en ese caso
+    `serialize_ms` suma lo que costó codificarlo antes, si lo hizo esta petición.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        serialize_ms: float = 0.0,
+        **kwargs,
+    ):
+        t0 = time.perf_counter()
+        super().__init__(content, status_code=status_code, headers=headers, **kwargs)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0 + serialize_ms
+        timing = f"serialize;dur={elapsed_ms:.2f}"
+        previous = self.headers.get("server-timing")
+        self.headers["server-timing"] = f"{previous}, {timing}" if previous else timing
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        if isinstance(content, bytes):
+            return content
+        return super().render(content)
@@ -1,7 +1,7 @@
 
 from __future__ import annotations
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict
 from datetime import date, datetime
 
 
@@ -52,7 +52,30 @@ class BateriaResponse(BaseModel):
     months_left: int
     percent_remaining: float
     status: str
-    recommendations: List[str]
+    recommendations: Tuple[str, ...]
+
+class BateriaFlotaItem(BaseModel):
+    install_date: date
+    battery_type: str = Field(pattern="^(convencional|agm|gel|litio)$")
+    usage: str = Field(pattern="^(diario|ocasional|esporadico)$")
+    climate: str = Field(pattern="^(templado|calido|frio|extremo)$")
+
+class BateriaFlotaRequest(BaseModel):
+    # Acotado: la evaluación corre en el event loop (ver api_bateria_pronostico)
+    batteries: List[BateriaFlotaItem] = Field(min_length=1, max_length=5000)
+    bin_months: int = Field(default=3, ge=1, le=24, description="Ancho de cada contenedor en meses")
+    horizon_months: int = Field(default=24, ge=1, le=120, description="Meses cubiertos por contenedores; el resto va al último")
+
+class BateriaFlotaBin(BaseModel):
+    from_months: int
+    to_months: Optional[int] = None  # None = sin límite superior
+    count: int
+
+class BateriaFlotaResponse(BaseModel):
+    total: int
+    due_now: int  # baterías con 0 meses restantes
+    bins: List[BateriaFlotaBin]
+    by_status: Dict[str, int]
 
 
 # ---------- Tips ----------
@@ -72,9 +95,13 @@ class AutopartesRequest(BaseModel):
     year: Optional[int] = None
     part_type: str = Field(default="")
 
+class AutopartesLink(BaseModel):
+    site: str
+    url: str
+
 class AutopartesResponse(BaseModel):
     query: str
-    links: List[dict]  # each: {"site": "MercadoLibre", "url": "https://..."}
+    links: List[AutopartesLink]
 
 
 # ---------- Depreciación ----------
@@ -85,11 +112,19 @@ class DepreciacionRequest(BaseModel):
     condition: str = Field(pattern="^(excelente|bueno|regular|malo)$")
     brand_class: str = Field(pattern="^(premium|japonesa|americana|europea|coreana)$")
 
+class DepreciacionBreakdown(BaseModel):
+    age_years: int
+    base_residual_factor: float
+    brand_factor: float
+    condition_factor: float
+    mileage_factor: float
+    final_residual_factor: float
+
 class DepreciacionResponse(BaseModel):
     estimated_value: float
     depreciation_percent: float
     annual_loss_avg: float
-    breakdown: dict
+    breakdown: DepreciacionBreakdown
 
 
 # ---------- Proyección de fallos (gráficas) ----------
@@ -103,14 +138,51 @@ class FalloProyeccionRequest(BaseModel):
     clima: Optional[str] = Field(default=None, description="templado|calido|frio")
     horizon_km: Optional[float] = Field(default=None, gt=0)
     points: Optional[int] = Field(default=201, ge=51, le=1001)
+    chart_format: str = Field(default="png", pattern="^(png|png_ligero|svg)$", description="png (144 dpi) | png_ligero (96 dpi, paleta) | svg")
+
+class FalloMeta(BaseModel):
+    part_type: str
+    t_now_km: float
+    interval_km: float
+    lambda_km: float
+    k_km: float
+    interval_months: Optional[float] = None
+    lambda_months: Optional[float] = None
+    k_month: Optional[float] = None
+
+class FalloTemporal(BaseModel):
+    risk_next_1m_pct: float
+    risk_next_3m_pct: float
+    risk_next_6m_pct: float
 
 class FalloProyeccionResponse(BaseModel):
     part_type: str
     x_km: list[float]
     risk_pct: list[float]
     chart_url: str
-    meta: dict
-    temporal: Optional[dict] = None
+    meta: FalloMeta
+    temporal: Optional[FalloTemporal] = None
+
+class FalloMatrizParte(BaseModel):
+    part_type: str = Field(description="aceite|frenos|correa|bateria|neumaticos|filtro_aire|refrigerante_mangueras")
+    last_service_km: float = Field(ge=0)
+    service_interval_km: float = Field(gt=0)
+
+class FalloMatrizRequest(BaseModel):
+    current_km: float = Field(ge=0)
+    parts: List[FalloMatrizParte] = Field(min_length=1, max_length=7)
+    clima: Optional[str] = Field(default=None, description="templado|calido|frio")
+    horizon_km: Optional[float] = Field(default=None, gt=0)
+    points: Optional[int] = Field(default=201, ge=51, le=1001)
+    render_chart: bool = Field(default=True, description="Genera una gráfica combinada (una línea por autoparte)")
+    chart_format: str = Field(default="png", pattern="^(png|png_ligero|svg)$", description="png (144 dpi) | png_ligero (96 dpi, paleta) | svg")
+
+class FalloMatrizResponse(BaseModel):
+    part_types: List[str]
+    x_km: list[float]
+    risk_pct: list[list[float]]  # una fila por autoparte, en el orden de part_types
+    chart_url: Optional[str] = None
+    meta: List[FalloMeta]
 
 # ---------- Google Calendar ----------
 class CalendarEventRequest(BaseModel):
@@ -2,12 +2,15 @@
 from __future__ import annotations
 from datetime import date, datetime, timedelta
 from math import ceil
-from typing import List, Dict
+from typing import List, Dict, Tuple
+
+import numpy as np
 
 from .schemas import (
     ServicioRequest, ServicioResponse,
     ConsumoRequest, ConsumoResponse,
     BateriaRequest, BateriaResponse,
+    BateriaFlotaRequest, BateriaFlotaResponse, BateriaFlotaBin,
     AutopartesRequest, AutopartesResponse,
     DepreciacionRequest, DepreciacionResponse
 )
@@ -108,40 +111,116 @@ def _months_between(d0: date, d1: date) -> float:
     days = (d1 - d0).days
     return days / 30.44
 
-def eval_bateria(payload: BateriaRequest) -> BateriaResponse:
-    base = _BASE_MONTHS[payload.battery_type]
-    factor = _USAGE_FACTOR[payload.usage] * _CLIMATE_FACTOR[payload.climate]
-    adjusted_total = int(round(base * factor))
+_BATTERY_STATUS = ("Óptima", "Atención", "Crítica")
 
-    months_elapsed = max(0, int(round(_months_between(payload.install_date, date.today()))))
-    months_left = max(0, adjusted_total - months_elapsed)
+# Compartidas entre todas las respuestas (inmutables)
+_BATTERY_RECOMMENDATIONS = (
+    "Revisa y limpia bornes/terminales cada 3 meses.",
+    "Evita descargas profundas; apaga accesorios con motor apagado.",
+    "Si el uso es esporádico, considera un mantenedor de batería.",
+)
 
+def _battery_health(adjusted_total: int, months_elapsed: int) -> Tuple[int, float, int]:
+    """(months_left, percent_remaining, índice de estado) para una vida ajustada y meses transcurridos."""
+    months_left = max(0, adjusted_total - months_elapsed)
     if adjusted_total == 0:
         percent_remaining = 0.0
     else:
         percent_remaining = max(0.0, (months_left / adjusted_total) * 100.0)
 
     if percent_remaining >= 60:
-        status = "Óptima"
+        status = 0
     elif percent_remaining >= 35:
-        status = "Atención"
+        status = 1
     else:
-        status = "Crítica"
+        status = 2
+    return months_left, round(percent_remaining, 1), status
+
+# Tabla precalculada indexada por (tipo, uso, clima, meses_transcurridos).
+# A partir de la vida ajustada el resultado ya no cambia, así que basta con
+# guardar meses 0.._BATTERY_MAX_MONTHS y recortar el índice.
+_BATTERY_TYPES = tuple(_BASE_MONTHS)
+_BATTERY_USAGES = tuple(_USAGE_FACTOR)
+_BATTERY_CLIMATES = tuple(_CLIMATE_FACTOR)
+_BATTERY_ADJUSTED = np.array([
+    [[int(round(_BASE_MONTHS[t] * _USAGE_FACTOR[u] * _CLIMATE_FACTOR[c])) for c in _BATTERY_CLIMATES]
+     for u in _BATTERY_USAGES]
+    for t in _BATTERY_TYPES
+], dtype=np.int32)
+_BATTERY_MAX_MONTHS = int(_BATTERY_ADJUSTED.max())
+
+def _build_battery_table():
+    shape = _BATTERY_ADJUSTED.shape + (_BATTERY_MAX_MONTHS + 1,)
+    months_left = np.empty(shape, dtype=np.int32)
+    percent = np.empty(shape, dtype=np.float64)
+    status = np.empty(shape, dtype=np.int8)
+    for idx, adjusted_total in np.ndenumerate(_BATTERY_ADJUSTED):
+        for m in range(_BATTERY_MAX_MONTHS + 1):
+            months_left[idx + (m,)], percent[idx + (m,)], status[idx + (m,)] = _battery_health(int(adjusted_total), m)
+    for arr in (months_left, percent, status):
+        arr.setflags(write=False)
+    return months_left, percent, status
+
+_BATTERY_MONTHS_LEFT, _BATTERY_PERCENT, _BATTERY_STATUS_IDX = _build_battery_table()
+
+_BATTERY_TYPE_POS = {v: i for i, v in enumerate(_BATTERY_TYPES)}
+_BATTERY_USAGE_POS = {v: i for i, v in enumerate(_BATTERY_USAGES)}
+_BATTERY_CLIMATE_POS = {v: i for i, v in enumerate(_BATTERY_CLIMATES)}
+
+def _battery_index(battery_type: str, usage: str, climate: str) -> Tuple[int, int, int]:
+    return (_BATTERY_TYPE_POS[battery_type], _BATTERY_USAGE_POS[usage], _BATTERY_CLIMATE_POS[climate])
+
+def _months_elapsed(install_date: date, today: date) -> int:
+    return max(0, int(round(_months_between(install_date, today))))
 
-    recommendations = [
-        "Revisa y limpia bornes/terminales cada 3 meses.",
-        "Evita descargas profundas; apaga accesorios con motor apagado.",
-        "Si el uso es esporádico, considera un mantenedor de batería."
-    ]
+def eval_bateria(payload: BateriaRequest) -> BateriaResponse:
+    idx = _battery_index(payload.battery_type, payload.usage, payload.climate)
+    months_elapsed = _months_elapsed(payload.install_date, date.today())
+    cell = idx + (min(months_elapsed, _BATTERY_MAX_MONTHS),)
 
     return BateriaResponse(
-        base_months=base,
-        adjusted_total_months=adjusted_total,
+        base_months=_BASE_MONTHS[payload.battery_type],
+        adjusted_total_months=int(_BATTERY_ADJUSTED[idx]),
         months_elapsed=months_elapsed,
-        months_left=months_left,
-        percent_remaining=round(percent_remaining, 1),
-        status=status,
-        recommendations=recommendations
+        months_left=int(_BATTERY_MONTHS_LEFT[cell]),
+        percent_remaining=float(_BATTERY_PERCENT[cell]),
+        status=_BATTERY_STATUS[_BATTERY_STATUS_IDX[cell]],
+        recommendations=_BATTERY_RECOMMENDATIONS
+    )
+
+def forecast_bateria_flota(payload: BateriaFlotaRequest) -> BateriaFlotaResponse:
+    """Agrupa toda la flota por meses restantes en una sola pasada vectorizada."""
+    batteries = payload.batteries
+    n = len(batteries)
+    t_idx = np.fromiter((_BATTERY_TYPE_POS[b.battery_type] for b in batteries), dtype=np.intp, count=n)
+    u_idx = np.fromiter((_BATTERY_USAGE_POS[b.usage] for b in batteries), dtype=np.intp, count=n)
+    c_idx = np.fromiter((_BATTERY_CLIMATE_POS[b.climate] for b in batteries), dtype=np.intp, count=n)
+    # Mismo cálculo que _months_elapsed (redondeo al par, como round()), en un solo paso
+    installed = np.array([b.install_date for b in batteries], dtype="datetime64[D]")
+    days = (np.datetime64(date.today(), "D") - installed).astype(np.int64)
+    elapsed = np.clip(np.rint(days / 30.44), 0, _BATTERY_MAX_MONTHS).astype(np.intp)
+
+    months_left = _BATTERY_MONTHS_LEFT[t_idx, u_idx, c_idx, elapsed]
+    status_idx = _BATTERY_STATUS_IDX[t_idx, u_idx, c_idx, elapsed]
+
+    # Contenedores [0,b), [b,2b), ... y uno final abierto para >= horizonte
+    width = payload.bin_months
+    n_bins = -(-payload.horizon_months // width)
+    # El último contenedor puede ser parcial: todo lo que llega al horizonte va al abierto
+    bin_idx = np.where(months_left >= payload.horizon_months, n_bins, months_left // width)
+    counts = np.bincount(bin_idx, minlength=n_bins + 1)
+    bins = [
+        BateriaFlotaBin(from_months=i * width, to_months=min((i + 1) * width, payload.horizon_months), count=int(counts[i]))
+        for i in range(n_bins)
+    ]
+    bins.append(BateriaFlotaBin(from_months=payload.horizon_months, to_months=None, count=int(counts[n_bins])))
+
+    status_counts = np.bincount(status_idx, minlength=len(_BATTERY_STATUS))
+    return BateriaFlotaResponse(
+        total=n,
+        due_now=int(np.count_nonzero(months_left == 0)),
+        bins=bins,
+        by_status={s: int(c) for s, c in zip(_BATTERY_STATUS, status_counts)},
     )
 
 
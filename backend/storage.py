@@ -0,0 +1,210 @@
+from __future__ import annotations
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from .workers import run_blocking_io
+
+# Almacenamiento compartido para correr con `uvicorn --workers N` o varios nodos.
+# STORE_URL elige el backend:
+#   (sin definir)             -> modo local de siempre: gráficas en frontend/assets/generated
+#   sqlite:///ruta/store.db   -> un solo host, compartido entre workers
+#   redis://host:6379/0       -> varios nodos (requiere `pip install redis`)
+STORE_URL = os.getenv("STORE_URL", "")
+STORE_TTL_S = float(os.getenv("STORE_TTL_S", "3600"))
+LOCK_TTL_S = float(os.getenv("STORE_LOCK_TTL_S", "30"))  # mayor que el render más lento
+POLL_S = 0.05
+PURGE_INTERVAL_S = float(os.getenv("STORE_PURGE_INTERVAL_S", "300"))  # SQLite no expira filas por sí solo
+
+
+class BaseStore:
+    """Interfaz mínima: bytes por clave, con expiración opcional."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> bool:
+        """Guarda solo si la clave no existe. Devuelve True si la guardó."""
+        raise NotImplementedError
+
+    def delete_if(self, key: str, value: bytes) -> None:
+        """Borra la clave solo si aún tiene `value` (liberar un lock propio)."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStore(BaseStore):
+    """Archivo SQLite en modo WAL; sirve para varios workers en el mismo host."""
+
+    def __init__(self, path: str, purge_interval_s: float = PURGE_INTERVAL_S):
+        self.path = path
+        self.purge_interval_s = purge_interval_s
+        self._next_purge = time.time() + purge_interval_s
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        # Todas las conexiones abiertas, para poder cerrarlas desde cualquier hilo
+        self._conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo (las llamadas llegan desde el pool de I/O)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    @staticmethod
+    def _expires(ttl_s: Optional[float]) -> Optional[float]:
+        return time.time() + ttl_s if ttl_s else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)", (key, value, self._expires(ttl_s))
+        )
+        # Purga oportunista: como mucho una vez por intervalo y por worker
+        if time.time() >= self._next_purge:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Borra las filas vencidas; devuelve cuántas borró."""
+        now = time.time()
+        self._next_purge = now + self.purge_interval_s
+        cur = self._conn().execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        return cur.rowcount
+
+    def add(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM kv WHERE key = ? AND expires IS NOT NULL AND expires <= ?", (key, time.time()))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO kv (key, value, expires) VALUES (?, ?, ?)", (key, value, self._expires(ttl_s))
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return cur.rowcount == 1
+
+    def delete_if(self, key: str, value: bytes) -> None:
+        self._conn().execute("DELETE FROM kv WHERE key = ? AND value = ?", (key, value))
+
+    def close(self) -> None:
+        # Se llama desde el hilo del event loop, pero las conexiones se abrieron en el pool de I/O
+        with self._conns_lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+
+class RedisStore(BaseStore):
+    """Cualquier cliente con la API de redis-py (get/set con nx y px/delete).
+    En pruebas se puede pasar un sustituto local en lugar de un servidor real."""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisStore":
+        try:
+            import redis  # type: ignore
+        except ImportError as e:
+            raise RuntimeError("STORE_URL usa redis:// pero falta el paquete: pip install redis") from e
+        return cls(redis.Redis.from_url(url))
+
+    @staticmethod
+    def _px(ttl_s: Optional[float]) -> Optional[int]:
+        return int(ttl_s * 1000) if ttl_s else None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> None:
+        self.client.set(key, value, px=self._px(ttl_s))
+
+    def add(self, key: str, value: bytes, ttl_s: Optional[float] = None) -> bool:
+        return bool(self.client.set(key, value, nx=True, px=self._px(ttl_s)))
+
+    def delete_if(self, key: str, value: bytes) -> None:
+        # GET + DELETE no es atómico; el TTL del lock cubre la ventana restante
+        if self.client.get(key) == value:
+            self.client.delete(key)
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def store_from_url(url: str) -> Optional[BaseStore]:
+    if not url:
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore.from_url(url)
+    raise ValueError(f"STORE_URL no soportada: {url}")
+
+_store: Optional[BaseStore] = None
+_store_loaded = False
+
+def get_store() -> Optional[BaseStore]:
+    """Store compartido configurado por STORE_URL, o None en modo local."""
+    global _store, _store_loaded
+    if not _store_loaded:
+        _store = store_from_url(STORE_URL)
+        _store_loaded = True
+    return _store
+
+def close_store() -> None:
+    global _store, _store_loaded
+    if _store is not None:
+        _store.close()
+    _store, _store_loaded = None, False
+
+
+async def get_or_compute(
+    store: BaseStore,
+    key: str,
+    compute: Callable[[], Awaitable[bytes]],
+    ttl_s: Optional[float] = STORE_TTL_S,
+    lock_ttl_s: float = LOCK_TTL_S,
+) -> bytes:
+    """Devuelve store[key] o lo calcula una sola vez entre todos los workers.
+
+    Quien obtiene el lock `lock:<key>` calcula y guarda; los demás esperan a que
+    aparezca el valor. Si el lock expira sin valor (worker caído), otro lo toma."""
+    lock_key = f"lock:{key}"
+    token = uuid.uuid4().hex.encode()
+    while True:
+        value = await run_blocking_io(store.get, key)
+        if value is not None:
+            return value
+        if await run_blocking_io(store.add, lock_key, token, lock_ttl_s):
+            try:
+                value = await compute()
+                await run_blocking_io(store.set, key, value, ttl_s)
+                return value
+            finally:
+                await run_blocking_io(store.delete_if, lock_key, token)
+        await asyncio.sleep(POLL_S)
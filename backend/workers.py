@@ -0,0 +1,78 @@
+from __future__ import annotations
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+
+import anyio
+from fastapi import HTTPException
+
+# Modelo de ejecución:
+# - Calculadoras triviales: `async def`, corren directo en el event loop.
+# - Trabajo pesado de CPU (gráficas, simulaciones): pool de procesos acotado con control de admisión.
+# - I/O bloqueante sin cliente async (Google Calendar): hilos con su propio límite,
+#   para no agotar el threadpool por defecto de Starlette.
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+CPU_QUEUE_DEPTH = int(os.getenv("CPU_QUEUE_DEPTH", "16"))  # trabajos en espera además de los que corren
+IO_THREADS = int(os.getenv("IO_THREADS", "8"))
+RETRY_AFTER_S = 1
+
+_pool: Optional[ProcessPoolExecutor] = None
+_io_limiter: Optional[anyio.CapacityLimiter] = None
+# Solo se modifica desde el event loop, no necesita lock
+_cpu_in_flight = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # forkserver: el proceso padre ya tiene hilos (event loop, pool de I/O) y hacer
+        # fork con un lock tomado puede dejar bloqueado al hijo
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+def _overloaded(detail: str) -> HTTPException:
+    return HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(RETRY_AFTER_S)})
+
+
+async def run_cpu_bound(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Ejecuta fn en el pool de procesos. Responde 503 si la cola está llena."""
+    global _cpu_in_flight, _pool
+    if _cpu_in_flight >= CPU_WORKERS + CPU_QUEUE_DEPTH:
+        raise _overloaded("Servidor saturado, intenta de nuevo en unos segundos.")
+    _cpu_in_flight += 1
+    try:
+        pool = _get_pool()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, partial(fn, *args, **kwargs))
+    except BrokenProcessPool:
+        # Un worker murió; se recrea el pool en la siguiente petición. Solo se descarta
+        # si sigue siendo el actual: otra petición pudo haberlo recreado ya.
+        if _pool is pool:
+            _pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise _overloaded("El pool de cálculo se reinició, intenta de nuevo.")
+    finally:
+        _cpu_in_flight -= 1
+
+
+async def run_blocking_io(fn: Callable[..., Any], *args) -> Any:
+    """Ejecuta I/O bloqueante en hilos con un límite propio."""
+    global _io_limiter
+    if _io_limiter is None:
+        _io_limiter = anyio.CapacityLimiter(IO_THREADS)
+    return await anyio.to_thread.run_sync(partial(fn, *args), limiter=_io_limiter)
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        # Esperar a que los procesos terminen; si no, quedan huérfanos bloqueados en la cola
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
@@ -1,7 +1,93 @@
 
 const API_BASE = "/api";
 
+// Cálculos deterministas que no dependen de la fecha: se memorizan por hash de la entrada
+// (servicio, batería y depreciación usan "hoy", así que siempre van al servidor).
+const MEMO_PATHS = new Set(["/consumo/calculate", "/autopartes/search"]);
+const MEMO_PREFIX = "memo:v1:";
+
+function canonicalJSON(value) {
+  if (Array.isArray(value)) return `[${value.map(canonicalJSON).join(",")}]`;
+  if (value && typeof value === "object") {
+    return `{${Object.keys(value).sort().map(k => `${JSON.stringify(k)}:${canonicalJSON(value[k])}`).join(",")}}`;
+  }
+  return JSON.stringify(value);
+}
+
+// FNV-1a de 32 bits; la entrada completa se guarda junto al resultado para descartar colisiones
+function hashString(text) {
+  let h = 0x811c9dc5;
+  for (let i = 0; i < text.length; i++) {
+    h ^= text.charCodeAt(i);
+    h = Math.imul(h, 0x01000193);
+  }
+  return (h >>> 0).toString(16);
+}
+
+// Índice LRU (claves de la más vieja a la más reciente) para acotar lo que ocupa en localStorage
+const MEMO_INDEX_KEY = `${MEMO_PREFIX}index`;
+const MEMO_MAX_ENTRIES = 200;
+
+function memoIndex() {
+  try {
+    const idx = JSON.parse(localStorage.getItem(MEMO_INDEX_KEY));
+    return Array.isArray(idx) ? idx : [];
+  } catch (_) {
+    return [];
+  }
+}
+
+function memoTouch(key) {
+  const idx = memoIndex().filter(k => k !== key);
+  idx.push(key);
+  while (idx.length > MEMO_MAX_ENTRIES) localStorage.removeItem(idx.shift());
+  localStorage.setItem(MEMO_INDEX_KEY, JSON.stringify(idx));
+}
+
+function memoEvictOldest(count) {
+  const idx = memoIndex();
+  idx.splice(0, count).forEach(k => localStorage.removeItem(k));
+  localStorage.setItem(MEMO_INDEX_KEY, JSON.stringify(idx));
+}
+
+function memoGet(key, input) {
+  try {
+    const hit = JSON.parse(localStorage.getItem(key));
+    if (!hit || hit.input !== input) return null;
+    memoTouch(key);
+    return hit.output;
+  } catch (_) {
+    return null;
+  }
+}
+
+function memoSet(key, input, output) {
+  const value = JSON.stringify({ input, output });
+  try {
+    localStorage.setItem(key, value);
+    memoTouch(key);
+  } catch (_) {
+    // Cuota llena: liberar la mitad más vieja y reintentar una vez
+    try {
+      memoEvictOldest(Math.ceil(memoIndex().length / 2));
+      localStorage.setItem(key, value);
+      memoTouch(key);
+    } catch (_) {
+      // Almacenamiento deshabilitado: simplemente no se memoriza
+    }
+  }
+}
+
 async function apiPost(path, data) {
+  let memoKey = null;
+  let input = null;
+  if (MEMO_PATHS.has(path)) {
+    input = `${path}|${canonicalJSON(data)}`;
+    memoKey = MEMO_PREFIX + hashString(input);
+    const cached = memoGet(memoKey, input);
+    if (cached) return cached;
+  }
+
   const res = await fetch(`${API_BASE}${path}`, {
     method: "POST",
     headers: { "Content-Type": "application/json" },
@@ -12,7 +98,16 @@ async function apiPost(path, data) {
     const msg = detail?.detail || "Error al procesar la solicitud";
     throw new Error(msg);
   }
-  return res.json();
+  const out = await res.json();
+  if (memoKey) memoSet(memoKey, input, out);
+  return out;
+}
+
+// Service worker: app shell y tips disponibles sin conexión
+if ("serviceWorker" in navigator) {
+  window.addEventListener("load", () => {
+    navigator.serviceWorker.register("/sw.js").catch(err => console.warn("Service worker no registrado:", err));
+  });
 }
 
 // ---------------- Servicio ----------------
@@ -0,0 +1,100 @@
+// Service worker: precarga el "app shell" y los tips para que la app funcione sin red
+// (tabletas del taller con Wi‑Fi inestable). Sube CACHE_VERSION al cambiar estos archivos.
+const CACHE_VERSION = "v1";
+const SHELL_CACHE = `shell-${CACHE_VERSION}`;
+const RUNTIME_CACHE = `runtime-${CACHE_VERSION}`;
+
+const TIP_CATEGORIES = ["mantenimiento", "conduccion", "seguridad", "emergencia"];
+
+const PRECACHE_URLS = [
+  "/",
+  "/index.html",
+  "/assets/app.js",
+  "/assets/fallos.js",
+  "/assets/calendar.js",
+  ...TIP_CATEGORIES.map(c => `/api/tips/${c}`),
+];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then(cache => cache.addAll(PRECACHE_URLS))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    caches.keys()
+      .then(keys => Promise.all(
+        keys.filter(k => k !== SHELL_CACHE && k !== RUNTIME_CACHE).map(k => caches.delete(k))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+// Responde con caché si existe y actualiza en segundo plano
+async function staleWhileRevalidate(request, cacheName) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(request, { ignoreSearch: true });
+  const network = fetch(request)
+    .then(res => {
+      if (res.ok || res.type === "opaque") cache.put(request, res.clone());
+      return res;
+    })
+    .catch(() => cached || Response.error());
+  return cached || network;
+}
+
+// Las gráficas generadas tienen nombre único: una vez descargadas no cambian
+async function cacheFirst(request, cacheName) {
+  const cache = await caches.open(cacheName);
+  const cached = await cache.match(request);
+  if (cached) return cached;
+  const res = await fetch(request);
+  if (res.ok) cache.put(request, res.clone());
+  return res;
+}
+
+function offlineResponse() {
+  return new Response(
+    JSON.stringify({ detail: "Sin conexión. Este cálculo necesita red; intenta de nuevo cuando vuelva el Wi‑Fi." }),
+    { status: 503, headers: { "Content-Type": "application/json" } }
+  );
+}
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+
+  // Cálculos (POST): siempre a la red; los deterministas se memorizan en app.js
+  if (request.method !== "GET") {
+    if (url.origin === self.location.origin && url.pathname.startsWith("/api/")) {
+      event.respondWith(fetch(request).catch(offlineResponse));
+    }
+    return;
+  }
+
+  if (url.origin !== self.location.origin) {
+    // Tailwind y Google Fonts
+    event.respondWith(staleWhileRevalidate(request, RUNTIME_CACHE));
+    return;
+  }
+
+  // En modo STORE_URL las gráficas se sirven desde la API; también tienen nombre único
+  if (url.pathname.startsWith("/assets/generated/") || url.pathname.startsWith("/api/fallos/graficas/")) {
+    event.respondWith(cacheFirst(request, RUNTIME_CACHE));
+    return;
+  }
+
+  if (url.pathname.startsWith("/api/tips/")) {
+    event.respondWith(staleWhileRevalidate(request, SHELL_CACHE));
+    return;
+  }
+
+  if (url.pathname.startsWith("/api/") || url.pathname.startsWith("/docs") || url.pathname === "/openapi.json") {
+    return;  // resto de la API y docs: sin intervenir
+  }
+
+  event.respondWith(staleWhileRevalidate(request, SHELL_CACHE));
+});
@@ -0,0 +1,69 @@
+import itertools
+from datetime import date, timedelta
+
+import pytest
+from pydantic import ValidationError
+
+from backend.schemas import BateriaFlotaItem, BateriaFlotaRequest, BateriaRequest
+from backend.services import eval_bateria, forecast_bateria_flota
+
+
+def _battery(months_left: int) -> BateriaFlotaItem:
+    # convencional + diario + templado = 36 meses de vida ajustada
+    months_elapsed = 36 - months_left
+    return BateriaFlotaItem(
+        install_date=date.today() - timedelta(days=round(months_elapsed * 30.44)),
+        battery_type="convencional",
+        usage="diario",
+        climate="templado",
+    )
+
+
+def _counts(resp):
+    return {(b.from_months, b.to_months): b.count for b in resp.bins}
+
+
+def test_horizon_not_multiple_of_bin_width():
+    fleet = [_battery(m) for m in (0, 2, 8, 9, 10, 11, 20)]
+    resp = forecast_bateria_flota(BateriaFlotaRequest(batteries=fleet, bin_months=3, horizon_months=10))
+
+    assert _counts(resp) == {
+        (0, 3): 2,
+        (3, 6): 0,
+        (6, 9): 1,
+        (9, 10): 1,
+        (10, None): 3,
+    }
+    assert resp.total == 7
+    assert resp.due_now == 1
+
+
+def test_horizon_multiple_of_bin_width():
+    fleet = [_battery(m) for m in (0, 5, 6, 11, 12, 30)]
+    resp = forecast_bateria_flota(BateriaFlotaRequest(batteries=fleet, bin_months=6, horizon_months=12))
+
+    assert _counts(resp) == {(0, 6): 2, (6, 12): 2, (12, None): 2}
+
+
+def test_matches_single_battery_evaluation():
+    fleet = [
+        BateriaFlotaItem(install_date=date.today() - timedelta(days=d), battery_type=t, usage=u, climate=c)
+        for d, t, u, c in itertools.product(
+            range(0, 4000, 97), ("convencional", "agm", "gel", "litio"), ("diario", "esporadico"), ("templado", "extremo")
+        )
+    ]
+    resp = forecast_bateria_flota(BateriaFlotaRequest(batteries=fleet, bin_months=1, horizon_months=120))
+
+    singles = [eval_bateria(BateriaRequest(**b.model_dump())) for b in fleet]
+    expected = {}
+    for s in singles:
+        key = min(s.months_left, 120)
+        expected[key] = expected.get(key, 0) + 1
+    got = {b.from_months: b.count for b in resp.bins if b.count}
+    assert got == expected
+    assert resp.by_status == {st: sum(s.status == st for s in singles) for st in resp.by_status}
+
+
+def test_fleet_size_is_bounded():
+    with pytest.raises(ValidationError):
+        BateriaFlotaRequest(batteries=[_battery(1)] * 5001)
@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+from backend.reliability import _TEMPLATES, project_failure_curve, render_failure_chart
+
+
+def _render(meta_args, fmt, reuse):
+    xs, ys, meta, _ = project_failure_curve(*meta_args, points=51)
+    buf = io.BytesIO()
+    render_failure_chart(xs, ys, meta, buf, fmt=fmt, reuse=reuse)
+    return buf.getvalue()
+
+
+# SVG lleva ids y fecha que cambian entre figuras; se comparan solo los PNG
+@pytest.mark.parametrize("fmt", ["png", "png_ligero"])
+@pytest.mark.parametrize("order", ["narrow_first", "wide_first"])
+def test_reused_template_does_not_depend_on_previous_render(fmt, order):
+    _TEMPLATES.clear()
+    # Mismo kilometraje, intervalos muy distintos: cambian el rango y las etiquetas de ambos ejes
+    narrow = ("frenos", 40000, 30000, 500)
+    wide = ("frenos", 40000, 30000, 20000)
+    first, second = (narrow, wide) if order == "narrow_first" else (wide, narrow)
+
+    _render(first, fmt, reuse=True)
+    reused = _render(second, fmt, reuse=True)
+    fresh = _render(second, fmt, reuse=False)
+
+    assert reused == fresh
@@ -0,0 +1,12 @@
+import random
+
+import pytest
+
+from backend.loadtest import ROUTES
+
+
+@pytest.mark.parametrize("name", sorted(n for n, r in ROUTES.items() if r.payload))
+def test_generated_payloads_are_valid(name):
+    random.seed(0)
+    for _ in range(3000):
+        ROUTES[name].payload()
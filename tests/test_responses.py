@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+from backend import api_reliability
+from backend.responses import ModelResponse
+from backend.schemas import FalloProyeccionRequest
+from backend.storage import SQLiteStore
+
+
+def _dur_ms(response) -> float:
+    timing = response.headers["server-timing"]
+    assert timing.startswith("serialize;dur=")
+    return float(timing.split("=", 1)[1])
+
+
+def test_model_response_passes_encoded_bytes_through():
+    response = ModelResponse(b'{"a":1}', serialize_ms=2.5)
+    assert response.body == b'{"a":1}'
+    assert response.headers["content-type"] == "application/json"
+    assert _dur_ms(response) >= 2.5
+
+
+def test_store_mode_projection_reports_serialize_timing(tmp_path, monkeypatch):
+    async def fake_run_cpu_bound(fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    monkeypatch.setattr(api_reliability, "run_cpu_bound", fake_run_cpu_bound)
+    monkeypatch.setattr(api_reliability, "render_failure_chart", lambda *a, **k: None)
+    monkeypatch.setattr(api_reliability, "get_store", lambda: store)
+    monkeypatch.setattr(api_reliability, "STORE_URL", "sqlite:///" + str(tmp_path / "store.db"))
+    monkeypatch.setattr(api_reliability, "_flights", api_reliability._SingleFlight())
+    payload = FalloProyeccionRequest(part_type="frenos", current_km=42000, last_service_km=30000, service_interval_km=20000)
+
+    first = asyncio.run(api_reliability.proyeccion_fallos(payload))
+    cached = asyncio.run(api_reliability.proyeccion_fallos(payload))
+
+    assert first.body == cached.body
+    assert json.loads(first.body)["chart_url"].startswith("/api/fallos/graficas/")
+    assert _dur_ms(first) > 0
+    assert _dur_ms(cached) >= 0
+    store.close()
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from backend import api_reliability
+from backend.schemas import FalloProyeccionRequest
+from backend.storage import SQLiteStore
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Modo local con el pool y el render sustituidos por contadores."""
+    calls = {"jobs": 0, "renders": 0}
+
+    async def fake_run_cpu_bound(fn, *args, **kwargs):
+        calls["jobs"] += 1
+        await asyncio.sleep(0.05)  # mantener el cálculo en vuelo mientras llegan los demás
+        return fn(*args, **kwargs)
+
+    def fake_render(*args, **kwargs):
+        calls["renders"] += 1
+
+    monkeypatch.setattr(api_reliability, "run_cpu_bound", fake_run_cpu_bound)
+    monkeypatch.setattr(api_reliability, "render_failure_chart", fake_render)
+    monkeypatch.setattr(api_reliability, "get_store", lambda: None)
+    monkeypatch.setattr(api_reliability, "STORE_URL", "")
+    monkeypatch.setattr(api_reliability, "_flights", api_reliability._SingleFlight())
+    return calls
+
+
+def _request(part_type: str) -> FalloProyeccionRequest:
+    return FalloProyeccionRequest(
+        part_type=part_type, current_km=42000, last_service_km=30000, service_interval_km=20000
+    )
+
+
+def test_identical_concurrent_requests_render_once(renders):
+    n = 8
+    payloads = [_request("frenos" if i % 2 else "FRENOS") for i in range(n)]
+
+    async def main():
+        return await asyncio.gather(*(api_reliability.proyeccion_fallos(p) for p in payloads))
+
+    bodies = [json.loads(r.body) for r in asyncio.run(main())]
+
+    assert renders == {"jobs": 1, "renders": 1}
+    assert len({b["chart_url"] for b in bodies}) == 1
+    assert api_reliability._flights.stats() == {"leaders": 1, "computed": 1, "coalesced": n - 1, "in_flight": 0}
+
+
+def test_different_requests_are_not_coalesced(renders):
+    async def main():
+        return await asyncio.gather(
+            api_reliability.proyeccion_fallos(_request("frenos")),
+            api_reliability.proyeccion_fallos(_request("aceite")),
+        )
+
+    bodies = [json.loads(r.body) for r in asyncio.run(main())]
+
+    assert renders == {"jobs": 2, "renders": 2}
+    assert bodies[0]["chart_url"] != bodies[1]["chart_url"]
+    assert api_reliability._flights.stats() == {"leaders": 2, "computed": 2, "coalesced": 0, "in_flight": 0}
+
+
+def test_store_hits_count_as_leaders_not_computations(renders, tmp_path, monkeypatch):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    monkeypatch.setattr(api_reliability, "get_store", lambda: store)
+
+    for part_type in ("frenos", "FRENOS", "frenos"):
+        asyncio.run(api_reliability.proyeccion_fallos(_request(part_type)))
+
+    assert renders == {"jobs": 1, "renders": 1}
+    assert api_reliability._flights.stats() == {"leaders": 3, "computed": 1, "coalesced": 0, "in_flight": 0}
+    store.close()
@@ -0,0 +1,138 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from backend.storage import RedisStore, SQLiteStore, get_or_compute
+
+
+class FakeRedis:
+    """Sustituto en memoria con el subconjunto de redis-py que usa RedisStore."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[key]
+            item = None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._alive(key)
+            return item[0] if item else None
+
+    def set(self, key, value, nx=False, px=None):
+        with self._lock:
+            if nx and self._alive(key) is not None:
+                return None
+            self._data[key] = (value, time.time() + px / 1000 if px else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            return int(self._data.pop(key, None) is not None)
+
+    def close(self):
+        pass
+
+
+def _rows(store: SQLiteStore) -> int:
+    return store._conn().execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+
+
+def test_sqlite_purge_expired_removes_only_expired_rows(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    store.set("vencida", b"x", ttl_s=0.01)
+    store.set("vigente", b"y", ttl_s=60)
+    store.set("permanente", b"z")
+    time.sleep(0.02)
+
+    assert store.purge_expired() == 1
+    assert _rows(store) == 2
+    assert store.get("vigente") == b"y"
+    assert store.get("permanente") == b"z"
+    store.close()
+
+
+def test_sqlite_set_purges_opportunistically(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"), purge_interval_s=0)
+    for i in range(5):
+        store.set(f"k{i}", b"x", ttl_s=0.01)
+    time.sleep(0.02)
+
+    store.set("nueva", b"y", ttl_s=60)
+    assert _rows(store) == 1
+    store.close()
+
+
+def test_sqlite_set_waits_for_purge_interval(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"), purge_interval_s=3600)
+    store.set("vencida", b"x", ttl_s=0.01)
+    time.sleep(0.02)
+
+    store.set("nueva", b"y", ttl_s=60)
+    assert _rows(store) == 2
+    assert store.get("vencida") is None
+    store.close()
+
+
+def test_get_or_compute_runs_once_when_callers_race():
+    store = RedisStore(FakeRedis())
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.1)
+        return b"grafica"
+
+    async def main():
+        return await asyncio.gather(*(get_or_compute(store, "k", compute) for _ in range(2)))
+
+    assert asyncio.run(main()) == [b"grafica", b"grafica"]
+    assert calls == 1
+    assert store.get("lock:k") is None
+
+
+def test_get_or_compute_releases_lock_when_compute_raises():
+    store = RedisStore(FakeRedis())
+
+    async def failing():
+        raise ValueError("parámetros inválidos")
+
+    async def ok():
+        return b"grafica"
+
+    with pytest.raises(ValueError):
+        asyncio.run(get_or_compute(store, "k", failing))
+    assert store.get("lock:k") is None
+    assert store.get("k") is None
+
+    # Con el lock liberado, la siguiente llamada calcula sin esperar a que expire
+    t0 = time.perf_counter()
+    assert asyncio.run(get_or_compute(store, "k", ok, lock_ttl_s=30)) == b"grafica"
+    assert time.perf_counter() - t0 < 1
+
+
+def test_sqlite_close_closes_connections_from_every_thread(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.db"))
+    threads = [threading.Thread(target=store.set, args=(f"k{i}", b"x")) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    conns = list(store._conns)
+    assert len(conns) == 4  # la del constructor + una por hilo
+
+    store.close()
+
+    for conn in conns:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert store._conns == []
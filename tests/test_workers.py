@@ -0,0 +1,51 @@
+import asyncio
+import os
+
+import pytest
+from fastapi import HTTPException
+
+from backend import workers
+
+
+def _crash():
+    os._exit(1)
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    workers.shutdown_pool()
+    yield
+    workers.shutdown_pool()
+
+
+def test_broken_pool_is_replaced_and_shut_down():
+    async def main():
+        results = await asyncio.gather(
+            workers.run_cpu_bound(_crash), workers.run_cpu_bound(_crash), return_exceptions=True
+        )
+        return results, await workers.run_cpu_bound(abs, -3)
+
+    broken = workers._get_pool()
+    results, value = asyncio.run(main())
+
+    assert all(isinstance(r, HTTPException) and r.status_code == 503 for r in results)
+    assert value == 3
+    assert workers._pool is not None and workers._pool is not broken
+    assert broken._shutdown_thread
+
+
+def test_late_failure_keeps_newer_pool():
+    async def main():
+        stale = asyncio.create_task(workers.run_cpu_bound(_crash))
+        await asyncio.sleep(0)  # la petición ya tomó el pool actual
+        broken = workers._pool
+        workers._pool = None
+        newer = workers._get_pool()  # otra petición lo recreó mientras tanto
+        with pytest.raises(HTTPException):
+            await stale
+        return broken, newer, await workers.run_cpu_bound(abs, -2)
+
+    broken, newer, value = asyncio.run(main())
+    assert value == 2
+    assert workers._pool is newer
+    assert broken._shutdown_thread